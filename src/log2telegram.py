@@ -13,11 +13,15 @@
 import os
 import sys
 import logging
+import mmap
+import random
 import requests
 import argparse
 import re
 import time
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Load environment variables from .env if present
 load_dotenv()
@@ -35,6 +39,32 @@ if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
     print("ERROR: TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID must be set as environment variables.")
     sys.exit(1)
 
+# Reuse one HTTPS connection for all Telegram sends instead of paying a fresh
+# TCP+TLS handshake per message. The transport Retry only covers connection
+# setup failures (urllib3 never status-retries POST by default); 429/5xx
+# handling lives in the retry loop in send_telegram_message.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(connect=2, read=0, status=0, backoff_factor=0.5),
+))
+SESSION.headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler backed by a 64 KB buffer without per-record flushing, which
+    keeps per-line debug logging from issuing a write() syscall per record.
+    The buffer is written out when the handler closes at shutdown.
+    """
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=65536,
+                    encoding=self.encoding, errors=getattr(self, 'errors', None))
+
+    def flush(self):
+        pass
+
 def setup_logging():
     logger = logging.getLogger('log2telegram.py')
     logger.setLevel(logging.DEBUG)
@@ -44,8 +74,8 @@ def setup_logging():
     log_file = os.path.join(LOGS_DIR, "log2telegram.log")
     if os.path.exists(log_file):
         os.remove(log_file)
-    # Use FileHandler to create new log file
-    handler = logging.FileHandler(log_file, mode='w')
+    # Use a buffered FileHandler to create new log file
+    handler = BufferedFileHandler(log_file, mode='w')
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
     handler.setFormatter(formatter)
     logger.addHandler(handler)
@@ -63,34 +93,52 @@ def setup_console_logging(verbose: bool):
         logger.addHandler(console_handler)
         logger.debug("Console logging enabled.")
 
-# Compile regex for FINAL_STATUS detection (flexible matching)
-FINAL_STATUS_PATTERN = re.compile(r'^FINAL_STATUS\s*\|', re.IGNORECASE)
+# Telegram caps messages at 4096 characters; leave headroom for Markdown.
+MAX_MESSAGE_LENGTH = 4000
+BATCH_SEPARATOR = "\n\n---\n\n"
 
-def send_telegram_message(message, retries=3, delay_between_retries=5):
+def send_telegram_message(message, retries=3, delay_between_retries=5, formatted=False):
     """
     Sends the given message to Telegram with a retry mechanism.
+    If 'formatted' is True, the message is sent as-is (already Markdown).
     """
-    formatted_message = format_message(message)
-    logger.debug(f"Formatted message to send: {formatted_message}")
+    formatted_message = message if formatted else format_message(message)
+    logger.debug("Formatted message to send: %s", formatted_message)
     for attempt in range(1, retries + 1):
+        retry_after = None
         try:
             payload = {
                 "chat_id": TELEGRAM_CHAT_ID,
                 "text": formatted_message,
                 "parse_mode": "Markdown"  # Using Markdown for better formatting
             }
-            response = requests.post(TELEGRAM_API_URL, data=payload, timeout=10)
+            response = SESSION.post(TELEGRAM_API_URL, data=payload, timeout=10)
             logger.debug(f"Telegram API response: {response.status_code} - {response.text}")
             if response.status_code == 200:
                 logger.info(f"Sent Telegram message: {formatted_message}")
                 return True
-            else:
-                logger.error(f"Failed to send Telegram message: {response.text}")
+            if response.status_code == 429:
+                # Telegram tells us exactly how long to back off
+                retry_after = response.headers.get("Retry-After")
+            logger.error(f"Failed to send Telegram message: {response.text}")
         except requests.exceptions.RequestException as e:
             logger.error(f"Exception occurred while sending Telegram message: {e}")
         if attempt < retries:
-            logger.info(f"Retrying in {delay_between_retries} seconds... (Attempt {attempt}/{retries})")
-            time.sleep(delay_between_retries)
+            if retry_after is not None:
+                try:
+                    sleep_for = float(retry_after)
+                except ValueError:
+                    sleep_for = delay_between_retries
+            else:
+                # Exponential backoff, capped at 30s
+                sleep_for = min(30, delay_between_retries * (2 ** (attempt - 1)))
+            if sleep_for > 0:
+                # Jitter avoids retrying in lockstep with other senders
+                sleep_for += random.uniform(0, 0.25)
+                logger.info(f"Retrying in {sleep_for:.1f} seconds... (Attempt {attempt}/{retries})")
+                time.sleep(sleep_for)
+            else:
+                logger.info(f"Retrying immediately... (Attempt {attempt}/{retries})")
     logger.error(f"Failed to send Telegram message after {retries} attempts.")
     return False
 
@@ -109,7 +157,14 @@ def format_message(raw_message, logger=None):
         *Snapshot:* `example.com-20241202133213`
         *Total Snapshots:* `3 snapshots exist`
     """
-    parts = raw_message.split(" | ")
+    # Anything without the marker cannot be a FINAL_STATUS entry; return it
+    # untouched before paying for the split
+    if "FINAL_STATUS" not in raw_message:
+        return raw_message
+
+    # One bounded split plus per-token strip; cheaper than a capturing regex
+    # and tolerant of irregular spacing around the pipes
+    parts = [part.strip() for part in raw_message.split("|", 7)]
     if len(parts) != 8:
         # Use the global logger if not provided
         if logger is None:
@@ -135,62 +190,120 @@ def format_message(raw_message, logger=None):
     )
     return formatted_message
 
+def format_batch(entries):
+    """
+    Formats multiple raw FINAL_STATUS entries and greedily packs them into
+    Markdown chunks of at most MAX_MESSAGE_LENGTH characters, separated by
+    BATCH_SEPARATOR. Returns a list of chunk strings, one per Telegram message.
+    """
+    chunks = []
+    current = []
+    current_length = 0
+    for raw_message in entries:
+        formatted = format_message(raw_message)
+        added_length = len(formatted) + (len(BATCH_SEPARATOR) if current else 0)
+        if current and current_length + added_length > MAX_MESSAGE_LENGTH:
+            chunks.append(BATCH_SEPARATOR.join(current))
+            current = []
+            current_length = 0
+            added_length = len(formatted)
+        current.append(formatted)
+        current_length += added_length
+    if current:
+        chunks.append(BATCH_SEPARATOR.join(current))
+    return chunks
+
+# Matches complete "timestamp - LEVEL - FINAL_STATUS | ..." log lines and
+# captures the message directly, so both the whole-buffer mmap scan and the
+# per-line fallback extract it in a single C-level pass with no split.
+FINAL_STATUS_LINE_PATTERN = re.compile(rb'(?m)^[^\n]* - [^\n]* - (FINAL_STATUS\s*\|[^\n]*)$')
+
+def _scan_log_lines(f):
+    """
+    Fallback line-by-line scan over an open binary file object, used when the
+    log file cannot be mmap'd (e.g. it is empty). Returns a list of
+    (line_number, message) tuples for each FINAL_STATUS entry.
+    """
+    final_status_entries = []
+    # Bind hot lookups to locals (LOAD_FAST) for the per-line loop
+    match = FINAL_STATUS_LINE_PATTERN.match
+    append = final_status_entries.append
+    debug = logger.debug
+    for line_number, raw in enumerate(f, start=1):
+        if b"FINAL_STATUS" not in raw:
+            continue
+
+        m = match(raw)
+        if m:
+            append((line_number, m.group(1).decode('utf-8', 'replace').strip()))
+        else:
+            # Deferred %-formatting: no string is built unless DEBUG is on
+            debug("Line %d: No FINAL_STATUS entry found.", line_number)
+    return final_status_entries
+
 def process_log(delay_between_messages: int):
     """
     Processes the log file for FINAL_STATUS entries and sends them via Telegram.
     Introduces a delay between sending multiple messages to avoid overwhelming Telegram.
     """
-    if not os.path.exists(LOG_FILE_PATH):
-        logger.error(f"Log file '{LOG_FILE_PATH}' does not exist.")
-        return
-
     try:
-        with open(LOG_FILE_PATH, 'r') as f:
-            lines = f.readlines()
-            if not lines:
-                logger.info("No lines to process.")
-                return
-
-            logger.info(f"Processing {len(lines)} line(s).")
-            final_status_entries = []
-            for line_number, line in enumerate(lines, start=1):
-                original_line = line  # Keep the original line for debugging
-                line = line.strip()
-
-                # Check if the line contains the delimiter ' - '
-                if " - " not in line:
-                    logger.debug(f"Line {line_number}: Skipping non-formatted line.")
-                    continue  # Skip lines without the expected format
-
-                # Split the log line into components
-                split_line = line.split(" - ", 2)  # Split into 3 parts: timestamp, level, message
-                if len(split_line) < 3:
-                    logger.warning(f"Malformed log line (less than 3 parts): {original_line.strip()}")
-                    continue  # Skip malformed lines
-
-                message_part = split_line[2]  # The actual log message
-
-                if FINAL_STATUS_PATTERN.match(message_part):
-                    final_status_entries.append((line_number, message_part))
-                else:
-                    logger.debug(f"Line {line_number}: No FINAL_STATUS entry found.")
-                    logger.debug(f"Processed Line {line_number}: {message_part}")  # Log the actual message content
+        # Opening directly (instead of an exists() check followed by open)
+        # saves a stat and closes the race with concurrent log rotation
+        # mmap the file and scan it with a single compiled regex: the kernel
+        # handles paging and the regex engine runs over the whole buffer
+        # without per-line Python overhead.
+        with open(LOG_FILE_PATH, 'rb', buffering=1 << 20) as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                mm = None  # Zero-byte files cannot be mapped
+
+            if mm is not None:
+                with mm:
+                    final_status_entries = []
+                    # Cheap memchr-speed substring probe: most runs have no
+                    # FINAL_STATUS entry at all, so skip the regex scan then.
+                    if mm.find(b"FINAL_STATUS") == -1:
+                        matches = ()
+                    else:
+                        matches = FINAL_STATUS_LINE_PATTERN.finditer(mm)
+                    # Line numbers are only needed for the few matches, so
+                    # count newlines incrementally up to each match start.
+                    line_number = 1
+                    scan_pos = 0
+                    for m in matches:
+                        message_part = m.group(1).decode('utf-8', 'replace').strip()
+                        line_number += mm[scan_pos:m.start()].count(b'\n')
+                        scan_pos = m.start()
+                        final_status_entries.append((line_number, message_part))
+            else:
+                final_status_entries = _scan_log_lines(f)
 
             if final_status_entries:
                 logger.info(f"Detected {len(final_status_entries)} FINAL_STATUS entry(ies) to send.")
-                for idx, (line_number, message) in enumerate(final_status_entries, start=1):
-                    logger.debug(f"Line {line_number}: Detected FINAL_STATUS entry.")
-                    success = send_telegram_message(message)
+                for line_number, _ in final_status_entries:
+                    logger.debug("Line %d: Detected FINAL_STATUS entry.", line_number)
+                # Coalesce entries into as few Telegram messages as possible
+                # to cut round-trips and inter-message delays.
+                chunks = format_batch([message for _, message in final_status_entries])
+                logger.info(f"Sending {len(chunks)} Telegram message(s) for {len(final_status_entries)} entry(ies).")
+                # Resolve module globals once; tests patching
+                # send_telegram_message are bound before this point
+                send = send_telegram_message
+                for idx, chunk in enumerate(chunks, start=1):
+                    success = send(chunk, formatted=True)
                     if not success:
-                        logger.error(f"Failed to send Telegram message for line {line_number}: {message}")
-                    if idx < len(final_status_entries):
-                        logger.debug(f"Waiting for {delay_between_messages} seconds before sending the next message.")
+                        logger.error(f"Failed to send Telegram message chunk {idx}/{len(chunks)}.")
+                    if idx < len(chunks):
+                        logger.debug("Waiting for %d seconds before sending the next message.", delay_between_messages)
                         time.sleep(delay_between_messages)
             else:
                 logger.info("No FINAL_STATUS entries detected to send.")
 
             logger.info(f"Processed {len(final_status_entries)} FINAL_STATUS entry(ies).")
 
+    except FileNotFoundError:
+        logger.error(f"Log file '{LOG_FILE_PATH}' does not exist.")
     except Exception as e:
         logger.error(f"Error processing log file: {e}")
 
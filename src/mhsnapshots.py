@@ -8,39 +8,135 @@
 # This script manages snapshots for multiple Hetzner Cloud servers, including creation, retention, and deletion.
 # Configuration is handled via YAML files located in the 'configs' subfolder, allowing individual settings per server.
 
+import functools
+import heapq
 import subprocess
+import shutil
 import logging
 from logging.handlers import RotatingFileHandler
 import datetime
 import os
+import random
 import sys
 import yaml
 import time
+import threading
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from operator import itemgetter
 from typing import List, Optional
 
+# orjson parses the hcloud JSON output considerably faster than the stdlib
+# json module; fall back transparently when it is not installed.
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+# PyYAML's libyaml-backed loader parses configs several times faster than the
+# pure-Python SafeLoader; fall back when the C extension is not available.
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Hetzner returns ISO-8601 UTC timestamps with a trailing 'Z'. Python 3.11+
+# parses that directly; older versions need the suffix rewritten first.
+if sys.version_info >= (3, 11):
+    _parse_timestamp = datetime.datetime.fromisoformat
+else:
+    def _parse_timestamp(value: str) -> datetime.datetime:
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        return datetime.datetime.fromisoformat(value)
+
 # Constants
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 CONFIGS_DIR = os.path.join(PROJECT_ROOT, "configs")
 LOGS_DIR = os.path.join(PROJECT_ROOT, "logs")
 DEFAULT_CONFIG_FILE = os.path.join(CONFIGS_DIR, "config.yaml")
 LOG_FILE = os.path.join(LOGS_DIR, "mhsnapshots.log")
-DELAY_BETWEEN_SERVERS = 5  # seconds
+SNAPSHOT_CACHE_TTL = 30  # seconds a fetched snapshot list is considered fresh
+MAX_PARALLEL_SERVERS = 8  # upper bound on concurrently managed servers
+
+# Template for the status line that log2telegram.py picks up; built once here
+# so write_final_status only fills in the fields.
+FINAL_STATUS_FMT = "FINAL_STATUS | mhsnapshots.py | {server} | {status} | {host} | {ts} | {snap} | {count} snapshots exist"
+
+# Cache for the resolved hcloud executable path so repeated SnapshotManager
+# constructions do not repeat the lookup.
+_HCLOUD_PATH: Optional[str] = None
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    FileHandler that writes through a 64 KB buffer and skips the per-record
+    flush, so verbose runs do not pay one write() syscall per log record.
+    The buffer is flushed when the handler is closed (logging.shutdown runs
+    at interpreter exit).
+    """
+
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=65536,
+                    encoding=self.encoding, errors=getattr(self, 'errors', None))
+
+    def flush(self):
+        pass
 
-@dataclass
+
+@dataclass(frozen=True)
 class ServerConfig:
+    # Explicit __slots__ (dataclass slots=True needs Python 3.10+) drops the
+    # per-instance __dict__; frozen makes instances hashable for cache keys.
+    __slots__ = ('id', 'name', 'api_token', 'retain_last_snapshots')
     id: str
     name: str
     api_token: str
     retain_last_snapshots: int
 
+@functools.lru_cache(maxsize=None)
+def _load_server_config(path: str, mtime: float) -> ServerConfig:
+    """
+    Parses and validates a single server config file. Cached on (path, mtime)
+    so reloading an unchanged file skips YAML parsing and reconstruction; the
+    mtime argument only serves to key the cache.
+    """
+    with open(path, 'r') as f:
+        # Parse a contiguous buffer rather than streaming reads
+        config = yaml.load(f.read(), Loader=_YamlLoader)
+    if not config or 'server' not in config:
+        raise ValueError("missing the 'server' key")
+    server = config['server']
+    for field in ('id', 'name', 'api_token', 'retain_last_snapshots'):
+        if field not in server:
+            raise ValueError(f"missing the '{field}' field under 'server'")
+    return ServerConfig(
+        id=server['id'],
+        name=server['name'],
+        api_token=server['api_token'],
+        retain_last_snapshots=int(server['retain_last_snapshots'])
+    )
+
+
 class SnapshotManager:
     def __init__(self, config_paths: List[str], verbose: bool = False):
         self.config_paths = config_paths
         self.verbose = verbose
         self.setup_logging()  # Set up logging first
         self.servers = self.load_configs()
+        # Cache of parsed 'image list' output per API token, so servers in
+        # the same project share one hcloud call instead of re-downloading
+        # the identical snapshot list.
+        self._snapshot_list_cache = {}  # api_token -> (fetch_time, parsed list)
+        self._cache_lock = threading.Lock()
+        # Memo for parsed 'created' timestamps; the same strings come back
+        # on every listing of an unchanged snapshot
+        self._timestamp_cache = {}
+        # The hostname is constant for the process lifetime
+        self._hostname = os.uname().nodename
+        # Snapshot of the environment for child processes; copied once here
+        # instead of per run_command call
+        self._base_env = os.environ.copy()
         self.hcloud_path = self.get_hcloud_path()
         if not self.hcloud_path:
             self.error_exit("hcloud command not found. Please ensure it is installed and accessible.")
@@ -53,29 +149,16 @@ class SnapshotManager:
                 full_path = path
             else:
                 full_path = os.path.join(CONFIGS_DIR, path)
-            if not os.path.exists(full_path):
-                self.error_exit(f"Configuration file '{full_path}' does not exist.")
             try:
-                with open(full_path, 'r') as f:
-                    config = yaml.safe_load(f)
-                if 'server' not in config:
-                    self.error_exit(f"Configuration file '{full_path}' is missing the 'server' key.")
-                server = config['server']
-                # Validate required fields
-                required_fields = ['id', 'name', 'api_token', 'retain_last_snapshots']
-                for field in required_fields:
-                    if field not in server:
-                        self.error_exit(f"Configuration file '{full_path}' is missing the '{field}' field under 'server'.")
-                servers.append(ServerConfig(
-                    id=server['id'],
-                    name=server['name'],
-                    api_token=server['api_token'],
-                    retain_last_snapshots=int(server['retain_last_snapshots'])
-                ))
+                # The (path, mtime) key lets repeated loads of an unchanged
+                # file come straight from the cache
+                servers.append(_load_server_config(full_path, os.path.getmtime(full_path)))
+            except FileNotFoundError:
+                self.error_exit(f"Configuration file '{full_path}' does not exist.")
             except yaml.YAMLError as e:
                 self.error_exit(f"Error parsing YAML file '{full_path}': {e}")
             except ValueError as ve:
-                self.error_exit(f"Invalid data type in '{full_path}': {ve}")
+                self.error_exit(f"Invalid configuration in '{full_path}': {ve}")
         if not servers:
             self.error_exit("No valid server configurations found.")
         return servers
@@ -83,8 +166,13 @@ class SnapshotManager:
     def get_hcloud_path(self) -> Optional[str]:
         """
         Find the hcloud CLI executable in common installation locations.
-        Checks PATH first, then common installation directories.
+        Checks common installation directories first, then PATH.
+        The resolved path is cached at module level across instances.
         """
+        global _HCLOUD_PATH
+        if _HCLOUD_PATH:
+            return _HCLOUD_PATH
+
         # Common installation paths for different operating systems
         common_paths = [
             "/usr/local/bin/hcloud",  # macOS, Linux
@@ -94,29 +182,27 @@ class SnapshotManager:
             os.path.expanduser("~/bin/hcloud"),  # User's bin
         ]
 
-        # First try to find hcloud in PATH
-        try:
-            # Use 'where' on Windows, 'which' on Unix-like systems
-            command = "where hcloud" if os.name == 'nt' else "which hcloud"
-            result = subprocess.run(command, shell=True, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            path = result.stdout.decode().strip()
-            if path and os.path.exists(path):
-                self.logger.debug(f"Found hcloud in PATH: {path}")
-                return path
-        except subprocess.CalledProcessError:
-            pass
-
-        # If not found in PATH, check common installation locations
+        # Probe the handful of fixed install locations first: a stat() is
+        # microseconds, while a PATH walk has to stat every PATH entry.
         for path in common_paths:
-            if os.path.exists(path):
+            if os.path.isfile(path):
                 self.logger.debug(f"Found hcloud in common path: {path}")
+                _HCLOUD_PATH = path
                 return path
 
+        # Fall back to searching PATH (in-process, no shell fork)
+        path = shutil.which("hcloud")
+        if path:
+            self.logger.debug(f"Found hcloud in PATH: {path}")
+            _HCLOUD_PATH = path
+            return path
+
         # If still not found, try to find it in the current directory
         current_dir = os.path.dirname(os.path.abspath(__file__))
         local_path = os.path.join(current_dir, "hcloud")
-        if os.path.exists(local_path):
+        if os.path.isfile(local_path):
             self.logger.debug(f"Found hcloud in current directory: {local_path}")
+            _HCLOUD_PATH = local_path
             return local_path
 
         self.logger.error("hcloud CLI not found in PATH or common installation locations")
@@ -130,8 +216,8 @@ class SnapshotManager:
         # Delete existing log file if it exists
         if os.path.exists(LOG_FILE):
             os.remove(LOG_FILE)
-        # Use FileHandler to create new log file
-        handler = logging.FileHandler(LOG_FILE, mode='w')
+        # Use a buffered FileHandler to create the new log file
+        handler = BufferedFileHandler(LOG_FILE, mode='w')
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
         self.logger.addHandler(handler)
@@ -148,94 +234,138 @@ class SnapshotManager:
             print(f"ERROR: {message}", file=sys.stderr)
         sys.exit(1)
 
-    def run_command(self, command: str, api_token: str) -> Optional[str]:
+    def run_command(self, argv: List[str], api_token: str) -> Optional[bytes]:
+        """
+        Runs the given argv list and returns its stdout as raw bytes, so
+        large JSON payloads skip the decode round-trip; output is only
+        decoded (truncated) for logging. Taking a list avoids re-tokenizing
+        a command string per call and is safe for arguments with spaces.
+        """
         masked_token = api_token[:6] + '...' + api_token[-6:]
-        masked_command = command.replace(api_token, masked_token)
+        masked_command = " ".join(argv).replace(api_token, masked_token)
         self.logger.info(f"Executing command: {masked_command}")
         try:
-            env = os.environ.copy()
-            env["HCLOUD_TOKEN"] = api_token
-            result = subprocess.run(command.split(), check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
-            stdout = result.stdout.decode().strip()
-            stderr = result.stderr.decode().strip()
-            self.logger.debug(f"Command stdout: {stdout}")
+            env = {**self._base_env, "HCLOUD_TOKEN": api_token}
+            result = subprocess.run(argv, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+            stdout = result.stdout.strip()
+            stderr = result.stderr.strip()
+            self.logger.debug(f"Command stdout: {stdout[:200].decode('utf-8', 'replace')}")
             if stderr:
-                self.logger.warning(f"Command stderr: {stderr}")
+                self.logger.warning(f"Command stderr: {stderr.decode('utf-8', 'replace')}")
             return stdout
         except subprocess.CalledProcessError as e:
-            stdout = e.stdout.decode().strip() if e.stdout else ""
-            stderr = e.stderr.decode().strip() if e.stderr else ""
-            self.logger.error(f"Command failed: {stderr}")
-            self.logger.debug(f"Failed command output: {stdout}")
+            stdout = e.stdout.strip() if e.stdout else b""
+            stderr = e.stderr.strip() if e.stderr else b""
+            self.logger.error(f"Command failed: {stderr.decode('utf-8', 'replace')}")
+            self.logger.debug(f"Failed command output: {stdout[:200].decode('utf-8', 'replace')}")
             return None
 
-    def get_snapshots(self, server: ServerConfig) -> List[dict]:
-        command = f"{self.hcloud_path} image list --type snapshot --output json"
-        snapshots_output = self.run_command(command, server.api_token)
-        snapshots = []
+    def _invalidate_snapshot_cache(self, api_token: str):
+        with self._cache_lock:
+            self._snapshot_list_cache.pop(api_token, None)
 
-        if snapshots_output:
-            try:
-                import json
-                snapshots_data = json.loads(snapshots_output)
-                for snap in snapshots_data:
-                    # Check if this snapshot belongs to our server
-                    if snap.get('created_from', {}).get('id') == int(server.id):
-                        try:
-                            created_at = datetime.datetime.fromisoformat(snap['created'].replace('Z', '+00:00')).astimezone(datetime.timezone.utc)
-                            snapshots.append({
-                                "id": str(snap['id']),
-                                "name": snap['description'],  # Use description as name
-                                "created_at": created_at
-                            })
-                            self.logger.debug(f"Server '{server.name}': Snapshot found: {snap['description']} (ID: {snap['id']}) created at {created_at}")
-                        except ValueError as ve:
-                            self.logger.error(f"Server '{server.name}': Invalid date format for snapshot '{snap['description']}': {snap['created']}")
-            except json.JSONDecodeError as je:
-                self.logger.error(f"Server '{server.name}': Failed to parse snapshot data: {je}")
-        else:
+    def _fetch_snapshot_list(self, server: ServerConfig) -> Optional[List[dict]]:
+        """
+        Return the parsed 'image list' output for the project the server's
+        token belongs to, reusing a cached result if it is still fresh.
+        """
+        with self._cache_lock:
+            cached = self._snapshot_list_cache.get(server.api_token)
+        if cached and time.time() - cached[0] < SNAPSHOT_CACHE_TTL:
+            self.logger.debug(f"Server '{server.name}': Using cached snapshot list.")
+            return cached[1]
+
+        command = [self.hcloud_path, "image", "list", "--type", "snapshot", "--output", "json"]
+        snapshots_output = self.run_command(command, server.api_token)
+        if not snapshots_output:
             self.logger.error(f"Server '{server.name}': No snapshots retrieved or an error occurred during retrieval.")
+            return None
+
+        try:
+            snapshots_data = json_loads(snapshots_output)
+        except ValueError as je:
+            self.logger.error(f"Server '{server.name}': Failed to parse snapshot data: {je}")
+            return None
+
+        with self._cache_lock:
+            self._snapshot_list_cache[server.api_token] = (time.time(), snapshots_data)
+        return snapshots_data
 
+    def get_snapshots(self, server: ServerConfig) -> List[dict]:
+        snapshots = []
+        snapshots_data = self._fetch_snapshot_list(server)
+
+        if snapshots_data:
+            for snap in snapshots_data:
+                # Check if this snapshot belongs to our server
+                if snap.get('created_from', {}).get('id') == int(server.id):
+                    try:
+                        raw_created = snap['created']
+                        created_at = self._timestamp_cache.get(raw_created)
+                        if created_at is None:
+                            created_at = _parse_timestamp(raw_created)
+                            self._timestamp_cache[raw_created] = created_at
+                        snapshots.append({
+                            "id": str(snap['id']),
+                            "name": snap['description'],  # Use description as name
+                            "created_at": created_at
+                        })
+                        self.logger.debug(f"Server '{server.name}': Snapshot found: {snap['description']} (ID: {snap['id']}) created at {created_at}")
+                    except ValueError as ve:
+                        self.logger.error(f"Server '{server.name}': Invalid date format for snapshot '{snap['description']}': {snap['created']}")
+
+        # Return newest first so callers do not have to re-sort
+        snapshots.sort(key=itemgetter('created_at'), reverse=True)
         return snapshots
 
     def identify_snapshots_to_delete(self, server: ServerConfig, snapshots: List[dict], retain: int) -> List[dict]:
-        snapshots.sort(key=lambda x: x['created_at'], reverse=True)
-        to_delete = snapshots[retain:]
+        """
+        Returns everything but the `retain` newest snapshots. Selecting the
+        top-K with heapq.nlargest is O(n log retain) and works regardless of
+        input order, so callers need not pre-sort.
+        """
+        keep_ids = {snap['id'] for snap in heapq.nlargest(retain, snapshots, key=itemgetter('created_at'))}
+        to_delete = [snap for snap in snapshots if snap['id'] not in keep_ids]
         self.logger.info(f"Server '{server.name}': Identified {len(to_delete)} snapshot(s) for deletion: {[snap['name'] for snap in to_delete]}")
         return to_delete
 
     def wait_for_snapshot_ready(self, server: ServerConfig, snapshot_id: str, max_wait_time: int = 300) -> bool:
         """
         Wait for a snapshot to be ready (available) before proceeding.
+        Polls with exponential backoff (1s doubling up to 10s, with jitter)
+        so fast snapshots are caught quickly without hammering the API.
         Returns True if the snapshot is ready, False if it times out.
         """
         start_time = time.time()
+        delay = 1.0
         while time.time() - start_time < max_wait_time:
-            command = f"{self.hcloud_path} image describe {snapshot_id} --output json"
+            command = [self.hcloud_path, "image", "describe", snapshot_id, "--output", "json"]
             result = self.run_command(command, server.api_token)
             if result:
                 try:
-                    import json
-                    snapshot_data = json.loads(result)
+                    snapshot_data = json_loads(result)
                     if snapshot_data.get('status') == 'available':
                         self.logger.info(f"Server '{server.name}': Snapshot {snapshot_id} is now available.")
                         return True
                     self.logger.debug(f"Server '{server.name}': Snapshot {snapshot_id} status: {snapshot_data.get('status')}")
-                except json.JSONDecodeError:
+                except ValueError:
                     self.logger.error(f"Server '{server.name}': Failed to parse snapshot status data.")
-            time.sleep(10)  # Check every 10 seconds
+            # Jitter avoids synchronized polling when servers run in parallel
+            time.sleep(delay * (0.8 + 0.4 * random.random()))
+            delay = min(delay * 2, 10.0)
         self.logger.error(f"Server '{server.name}': Snapshot {snapshot_id} did not become available within {max_wait_time} seconds.")
         return False
 
     def create_snapshot(self, server: ServerConfig) -> Optional[str]:
         timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
         snapshot_name = f"{server.name}-{timestamp}"
-        command = f"{self.hcloud_path} server create-image --type snapshot --description {snapshot_name} {server.id}"
+        command = [self.hcloud_path, "server", "create-image", "--type", "snapshot", "--description", snapshot_name, str(server.id)]
         result = self.run_command(command, server.api_token)
+        self._invalidate_snapshot_cache(server.api_token)
         if result:
             # Extract snapshot ID from the result
             try:
-                snapshot_id = result.split()[1]  # Format: "Image 123456789 created from Server 123456"
+                snapshot_id = result.split()[1].decode()  # Format: "Image 123456789 created from Server 123456"
                 if self.wait_for_snapshot_ready(server, snapshot_id):
                     self.logger.info(f"Server '{server.name}': New snapshot created: {snapshot_name}")
                     return snapshot_name
@@ -249,52 +379,71 @@ class SnapshotManager:
             self.logger.error(f"Server '{server.name}': Failed to create a new snapshot.")
             return None
 
-    def delete_snapshots(self, server: ServerConfig, snapshots: List[dict]):
-        for snap in snapshots:
-            command = f"{self.hcloud_path} image delete {snap['id']}"
-            result = self.run_command(command, server.api_token)
+    def delete_snapshots(self, server: ServerConfig, snapshots: List[dict]) -> int:
+        """
+        Deletes the given snapshots concurrently (bounded at 4 workers to
+        stay friendly to the API) and returns the number successfully deleted.
+        """
+        if not snapshots:
+            return 0
+
+        def delete_one(snap):
+            return self.run_command([self.hcloud_path, "image", "delete", snap['id']], server.api_token)
+
+        deleted_count = 0
+        with ThreadPoolExecutor(max_workers=min(4, len(snapshots))) as executor:
+            results = list(executor.map(delete_one, snapshots))
+        for snap, result in zip(snapshots, results):
             if result is not None:
+                deleted_count += 1
                 self.logger.info(f"Server '{server.name}': Snapshot deleted: {snap['name']}")
             else:
                 self.logger.error(f"Server '{server.name}': Failed to delete snapshot: {snap['name']}")
+        self._invalidate_snapshot_cache(server.api_token)
+        return deleted_count
 
     def write_final_status(self, server: ServerConfig, snapshot_name: str, total_snapshots: int, status: str):
-        hostname = os.uname().nodename
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        final_status_message = f"FINAL_STATUS | mhsnapshots.py | {server.name} | {status.upper()} | {hostname} | {timestamp} | {snapshot_name} | {total_snapshots} snapshots exist"
-        self.logger.info(final_status_message)
+        # time.strftime avoids building a datetime object per status line
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.logger.info(FINAL_STATUS_FMT.format(
+            server=server.name,
+            status=status.upper(),
+            host=self._hostname,
+            ts=timestamp,
+            snap=snapshot_name,
+            count=total_snapshots,
+        ))
 
     def manage_snapshots_for_server(self, server: ServerConfig):
         self.logger.info(f"--- Managing server '{server.name}' (ID: {server.id}) ---")
         self.logger.info(f"Configuration: Retain last {server.retain_last_snapshots} snapshot(s). New snapshots will be named as '{server.name}-<timestamp>'.")
 
-        # Retrieve existing snapshots
-        snapshots = self.get_snapshots(server)
-        self.logger.info(f"Server '{server.name}': Found {len(snapshots)} existing snapshot(s).")
-
-        # Create a new snapshot
+        # Create a new snapshot first; a single listing afterwards covers the
+        # before-count, the retention decision and the final count, instead
+        # of three separate hcloud calls.
         snapshot_name = self.create_snapshot(server)
 
-        # Get updated snapshot list after creation
+        # Get the snapshot list after creation
         updated_snapshots = self.get_snapshots(server)
-        self.logger.info(f"Server '{server.name}': Found {len(updated_snapshots)} snapshot(s) after creation.")
-
-        # Sort snapshots by creation date (newest first)
-        updated_snapshots.sort(key=lambda x: x['created_at'], reverse=True)
+        if updated_snapshots or not snapshot_name:
+            # Clamp: a failed listing after a successful create would
+            # otherwise derive a before-count of -1
+            before_count = max(0, len(updated_snapshots) - (1 if snapshot_name else 0))
+            self.logger.info(f"Server '{server.name}': Found {before_count} existing snapshot(s), {len(updated_snapshots)} after creation.")
+        else:
+            self.logger.warning(f"Server '{server.name}': Snapshot listing after creation returned no data; counts may be incomplete.")
 
-        # Keep only the most recent snapshots as specified in retain_last_snapshots
-        snapshots_to_keep = updated_snapshots[:server.retain_last_snapshots]
-        snapshots_to_delete = updated_snapshots[server.retain_last_snapshots:]
+        # get_snapshots already returns the list sorted newest first
+        snapshots_to_delete = self.identify_snapshots_to_delete(server, updated_snapshots, server.retain_last_snapshots)
 
+        deleted_count = 0
         if snapshots_to_delete:
-            self.logger.info(f"Server '{server.name}': Identified {len(snapshots_to_delete)} snapshot(s) for deletion: {[snap['name'] for snap in snapshots_to_delete]}")
-            self.delete_snapshots(server, snapshots_to_delete)
+            deleted_count = self.delete_snapshots(server, snapshots_to_delete)
         else:
             self.logger.info(f"Server '{server.name}': No snapshots to delete based on retention policy.")
 
-        # Get final snapshot count
-        final_snapshots = self.get_snapshots(server)
-        total_snapshots = len(final_snapshots)
+        # Derive the final count from the listing and the successful deletions
+        total_snapshots = len(updated_snapshots) - deleted_count
 
         # Write final status to the log
         if snapshot_name:
@@ -306,14 +455,20 @@ class SnapshotManager:
         self.logger.info(f"--- Completed snapshot management for server '{server.name}' ---\n")
 
     def run(self):
-        for idx, server in enumerate(self.servers):
-            try:
-                self.manage_snapshots_for_server(server)
-                if idx < len(self.servers) - 1:
-                    self.logger.info(f"Waiting for {DELAY_BETWEEN_SERVERS} seconds before processing the next server...")
-                    time.sleep(DELAY_BETWEEN_SERVERS)
-            except Exception as e:
-                self.logger.error(f"An unexpected error occurred for server '{server.name}': {e}")
+        # Per-server work is independent and I/O-bound (hcloud subprocesses,
+        # snapshot polling), so overlap it across a bounded thread pool.
+        max_workers = min(MAX_PARALLEL_SERVERS, len(self.servers))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self.manage_snapshots_for_server, server): server
+                for server in self.servers
+            }
+            for future in as_completed(futures):
+                server = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"An unexpected error occurred for server '{server.name}': {e}")
 
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Manage snapshots for multiple Hetzner Cloud servers.")
@@ -332,9 +487,11 @@ def parse_arguments() -> argparse.Namespace:
 def main():
     args = parse_arguments()
     
-    # If no config files specified, use all .yaml files in the configs directory
+    # If no config files specified, use all .yaml files in the configs directory.
+    # scandir reuses the type information from the directory read instead of
+    # issuing a separate stat per entry.
     if not args.configs:
-        args.configs = [f for f in os.listdir(CONFIGS_DIR) if f.endswith('.yaml')]
+        args.configs = [e.name for e in os.scandir(CONFIGS_DIR) if e.is_file() and e.name.endswith('.yaml')]
         if not args.configs:
             print(f"Error: No .yaml configuration files found in the '{CONFIGS_DIR}' directory.", file=sys.stderr)
             sys.exit(1)
@@ -77,24 +77,40 @@ def test_process_log_multiple_entries(monkeypatch, patch_env):
     monkeypatch.setattr(log2telegram, 'time', MagicMock())
     log2telegram.logger = MagicMock()
     log2telegram.process_log(delay_between_messages=0)
-    assert len(sent) == 2
+    # Both entries fit into a single batched message
+    assert len(sent) == 1
     assert 'server1' in sent[0]
-    assert 'server2' in sent[1]
+    assert 'server2' in sent[0]
 
 def test_process_log_delay(monkeypatch, patch_env):
     log_file = patch_env
+    # Use enough entries that the batch overflows into two messages
     log_lines = [
-        '2024-12-02 13:32:34,000 - INFO - FINAL_STATUS | mhsnapshots.py | server1 | SUCCESS | host | 2024-12-02 13:32:34 | snap1 | 2 snapshots exist',
-        '2024-12-02 13:32:35,000 - INFO - FINAL_STATUS | mhsnapshots.py | server2 | FAILURE | host | 2024-12-02 13:32:35 | snap2 | 1 snapshots exist',
+        f'2024-12-02 13:32:34,000 - INFO - FINAL_STATUS | mhsnapshots.py | server{i} | SUCCESS | host | 2024-12-02 13:32:34 | snap{i} | 2 snapshots exist'
+        for i in range(40)
     ]
     log_file.write_text('\n'.join(log_lines) + '\n')
-    monkeypatch.setattr(log2telegram, 'send_telegram_message', lambda msg, **kwargs: True)
+    sent = []
+    monkeypatch.setattr(log2telegram, 'send_telegram_message', lambda msg, **kwargs: sent.append(msg) or True)
     sleep_calls = []
     monkeypatch.setattr(log2telegram.time, 'sleep', lambda s: sleep_calls.append(s))
     log2telegram.logger = MagicMock()
     log2telegram.process_log(delay_between_messages=5)
-    # Should sleep once between two messages
-    assert sleep_calls == [5]
+    # Should sleep once between each pair of chunks, not per entry
+    assert len(sent) > 1
+    assert sleep_calls == [5] * (len(sent) - 1)
+
+def test_format_batch_packs_and_splits():
+    raw = 'FINAL_STATUS | mhsnapshots.py | example.com | SUCCESS | host | 2024-12-02 13:32:34 | snap-20241202133213 | 3 snapshots exist'
+    # Two short entries fit into one chunk
+    chunks = log2telegram.format_batch([raw, raw])
+    assert len(chunks) == 1
+    assert chunks[0].count('*FINAL_STATUS*') == 2
+    assert log2telegram.BATCH_SEPARATOR in chunks[0]
+    # Many entries overflow into multiple chunks, each within the limit
+    chunks = log2telegram.format_batch([raw] * 50)
+    assert len(chunks) > 1
+    assert all(len(c) <= log2telegram.MAX_MESSAGE_LENGTH for c in chunks)
 
 def test_process_log_missing_file(monkeypatch, patch_env):
     log_file = patch_env
@@ -105,7 +121,7 @@ def test_process_log_missing_file(monkeypatch, patch_env):
     log2telegram.logger.error.assert_any_call(f"Log file '{log2telegram.LOG_FILE_PATH}' does not exist.")
 
 def test_send_telegram_message_success(monkeypatch):
-    # Patch requests.post to simulate success
+    # Patch the session's post to simulate success
     monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'dummy_token')
     monkeypatch.setenv('TELEGRAM_CHAT_ID', 'dummy_chat_id')
     monkeypatch.setattr(log2telegram, 'TELEGRAM_API_URL', 'http://fakeurl')
@@ -113,12 +129,12 @@ def test_send_telegram_message_success(monkeypatch):
     class FakeResp:
         status_code = 200
         text = 'ok'
-    monkeypatch.setattr(log2telegram.requests, 'post', lambda *a, **k: FakeResp())
+    monkeypatch.setattr(log2telegram.SESSION, 'post', lambda *a, **k: FakeResp())
     result = log2telegram.send_telegram_message('test message')
     assert result is True
 
 def test_send_telegram_message_failure(monkeypatch):
-    # Patch requests.post to simulate failure
+    # Patch the session's post to simulate failure
     monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'dummy_token')
     monkeypatch.setenv('TELEGRAM_CHAT_ID', 'dummy_chat_id')
     monkeypatch.setattr(log2telegram, 'TELEGRAM_API_URL', 'http://fakeurl')
@@ -126,6 +142,6 @@ def test_send_telegram_message_failure(monkeypatch):
     class FakeResp:
         status_code = 400
         text = 'fail'
-    monkeypatch.setattr(log2telegram.requests, 'post', lambda *a, **k: FakeResp())
+    monkeypatch.setattr(log2telegram.SESSION, 'post', lambda *a, **k: FakeResp())
     result = log2telegram.send_telegram_message('test message', retries=2, delay_between_retries=0)
     assert result is False 
\ No newline at end of file
@@ -9,6 +9,7 @@ import yaml
 # Add src directory to Python path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+import mhsnapshots
 from mhsnapshots import SnapshotManager, ServerConfig
 
 # Test data
@@ -81,32 +82,31 @@ def test_load_configs(snapshot_manager, mock_config_file):
     assert server.api_token == 'test-token-123456'
     assert server.retain_last_snapshots == 3
 
-def test_get_hcloud_path(snapshot_manager):
+def test_get_hcloud_path(snapshot_manager, monkeypatch):
     """Test finding the hcloud CLI executable."""
-    with patch('subprocess.run') as mock_run:
-        mock_run.return_value.stdout = b'/usr/local/bin/hcloud\n'
-        path = snapshot_manager.get_hcloud_path()
-        # Accept any of the common paths
-        assert path in [
-            '/usr/local/bin/hcloud',
-            '/usr/bin/hcloud',
-            '/opt/homebrew/bin/hcloud',
-            os.path.expanduser('~/.local/bin/hcloud'),
-            os.path.expanduser('~/bin/hcloud')
-        ]
+    monkeypatch.setattr(mhsnapshots, '_HCLOUD_PATH', None)
+    # Disable the filesystem probe so the test is hermetic even on hosts
+    # with hcloud installed in one of the common locations
+    monkeypatch.setattr(mhsnapshots.os.path, 'isfile', lambda p: False)
+    monkeypatch.setattr(mhsnapshots.shutil, 'which', lambda cmd: '/usr/local/bin/hcloud')
+    path = snapshot_manager.get_hcloud_path()
+    assert path == '/usr/local/bin/hcloud'
+    # The resolved path is cached and reused without a new lookup
+    monkeypatch.setattr(mhsnapshots.shutil, 'which', lambda cmd: None)
+    assert snapshot_manager.get_hcloud_path() == '/usr/local/bin/hcloud'
 
 def test_run_command(snapshot_manager):
     """Test running hcloud commands."""
     with patch('subprocess.run') as mock_run:
         mock_run.return_value.stdout = b'Command output'
         mock_run.return_value.stderr = b''
-        result = snapshot_manager.run_command('test command', 'test-token')
-        assert result == 'Command output'
+        result = snapshot_manager.run_command(['test', 'command'], 'test-token')
+        assert result == b'Command output'
 
 def test_get_snapshots(snapshot_manager):
     """Test retrieving snapshots for a server."""
     with patch('mhsnapshots.SnapshotManager.run_command') as mock_run:
-        mock_run.return_value = json.dumps(MOCK_SNAPSHOTS)
+        mock_run.return_value = json.dumps(MOCK_SNAPSHOTS).encode()
         server = ServerConfig('123456', 'test-server', 'test-token', 3)
         snapshots = snapshot_manager.get_snapshots(server)
         assert len(snapshots) == 4
@@ -138,8 +138,8 @@ def test_wait_for_snapshot_ready(snapshot_manager):
          patch('time.sleep', return_value=None):
         # First call returns 'creating', second call returns 'available'
         mock_run.side_effect = [
-            json.dumps({'status': 'creating'}),
-            json.dumps({'status': 'available'})
+            json.dumps({'status': 'creating'}).encode(),
+            json.dumps({'status': 'available'}).encode()
         ]
         server = ServerConfig('123456', 'test-server', 'test-token', 3)
         result = snapshot_manager.wait_for_snapshot_ready(server, '1', max_wait_time=5)
@@ -149,7 +149,7 @@ def test_create_snapshot(snapshot_manager):
     """Test creating a new snapshot."""
     with patch('mhsnapshots.SnapshotManager.run_command') as mock_run, \
          patch('mhsnapshots.SnapshotManager.wait_for_snapshot_ready') as mock_wait:
-        mock_run.return_value = 'Image 123456 created from Server 123456'
+        mock_run.return_value = b'Image 123456 created from Server 123456'
         mock_wait.return_value = True
         server = ServerConfig('123456', 'test-server', 'test-token', 3)
         snapshot_name = snapshot_manager.create_snapshot(server)
@@ -159,7 +159,7 @@ def test_create_snapshot(snapshot_manager):
 def test_delete_snapshots(snapshot_manager):
     """Test deleting snapshots."""
     with patch('mhsnapshots.SnapshotManager.run_command') as mock_run:
-        mock_run.return_value = 'Image deleted'
+        mock_run.return_value = b'Image deleted'
         server = ServerConfig('123456', 'test-server', 'test-token', 3)
         snapshots = [
             {'id': '1', 'name': 'test-snapshot-1'},
@@ -199,14 +199,16 @@ def test_manage_snapshots_for_server(snapshot_manager):
             } for i in range(1, 5)
         ]
         
-        # Mock successful snapshot creation
+        # Mock successful snapshot creation and deletion
         mock_create.return_value = 'test-server-new'
-        
+        mock_delete.return_value = 1
+
         server = ServerConfig('123456', 'test-server', 'test-token', 3)
         snapshot_manager.manage_snapshots_for_server(server)
-        
-        # Verify all expected methods were called
-        assert mock_get_snapshots.call_count >= 2  # Called at least twice (before and after creation)
+
+        # Verify all expected methods were called; the snapshot list is
+        # fetched exactly once, after creation
+        assert mock_get_snapshots.call_count == 1
         assert mock_create.call_count == 1
         assert mock_delete.call_count == 1
         assert mock_write.call_count == 1
@@ -221,7 +223,7 @@ def test_error_handling(snapshot_manager):
         assert result is None
 
         # Test invalid JSON response
-        mock_run.return_value = 'invalid json'
+        mock_run.return_value = b'invalid json'
         snapshots = snapshot_manager.get_snapshots(server)
         assert len(snapshots) == 0
 